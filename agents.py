@@ -1,6 +1,10 @@
 """Define the agents used in the test case generation system with improved context management"""
 import autogen
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Maximum number of agent sets kept by QAAgents.create_agents
+AGENT_CACHE_SIZE = 8
 
 class QAAgents:
     def __init__(self, agent_config: Dict, test_plan: Optional[List[Dict]] = None):
@@ -8,6 +12,13 @@ class QAAgents:
         self.agent_config = agent_config
         self.test_plan = test_plan
 
+        # Format the test plan context once; it is only rebuilt when the test plan's cases change
+        self._ctx = self._format_test_plan_context()
+        self._ctx_key = self._test_plan_key()
+
+        # Agents built by create_agents, keyed by initial prompt and test plan case ids, least recently used first
+        self._agent_cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+
     def _format_test_plan_context(self) -> str:
         """Format the test plan into a readable context"""
         if not self.test_plan:
@@ -24,9 +35,36 @@ class QAAgents:
             ])
         return "\n".join(context_parts)
 
+    def _test_plan_key(self) -> Tuple:
+        """Return the ids of the current test plan's cases, used to detect test plan changes"""
+        return tuple(test_case['id'] for test_case in (self.test_plan or []))
+
+    def _get_test_plan_context(self) -> str:
+        """Return the formatted test plan context, reformatting only when the test plan's cases changed"""
+        test_plan_key = self._test_plan_key()
+        if self._ctx_key != test_plan_key:
+            self._ctx = self._format_test_plan_context()
+            self._ctx_key = test_plan_key
+        return self._ctx
+
     def create_agents(self, initial_prompt: str) -> Dict:
-        """Create and return all agents needed for test case generation"""
-        test_plan_context = self._format_test_plan_context()
+        """Create and return all agents needed for test case generation
+
+        System messages keep their static role and format instructions first and
+        any per-run context (test plan, initial prompt) last, so each agent's
+        leading tokens stay identical from call to call and can be served from
+        the provider's prompt prefix cache.
+        """
+        cache_key = (initial_prompt, self._test_plan_key())
+        if cache_key in self._agent_cache:
+            self._agent_cache.move_to_end(cache_key)
+            agents = self._agent_cache[cache_key]
+            # Drop conversation state left over from the previous run
+            for agent in agents.values():
+                agent.reset()
+            return agents
+
+        test_plan_context = self._get_test_plan_context()
 
         # Memory Keeper: Maintains testing continuity and context
         memory_keeper = autogen.AssistantAgent(
@@ -38,14 +76,14 @@ class QAAgents:
             3. Maintain consistency across test cases, results, and automation scripts
             4. Flag any conflicts or gaps in requirements or testing coverage
 
-            Testing Overview:
-            {test_plan_context}
-
             Format your responses as follows:
             - Start updates with 'MEMORY UPDATE:'
             - List agent contributions with 'CONTRIBUTION:'
             - Highlight dependencies with 'DEPENDENCY:'
-            - Flag conflicts or issues with 'ISSUE ALERT:'""",
+            - Flag conflicts or issues with 'ISSUE ALERT:'
+
+            Testing Overview:
+            {test_plan_context}""",
             llm_config=self.agent_config,
         )
 
@@ -132,11 +170,25 @@ class QAAgents:
             system_message=f"""You are a test case orchestrator coordinating inputs from other agents.
 
             Your sole responsibility is:
-            1. Aggregate test cases from all agents
+            1. Aggregate test cases from all agents into a single test plan
             2. Ensure no requirement is missed
             3. Maintain a clear traceability matrix
 
             Format your output EXACTLY as:
+            TEST PLAN:
+            Test Case [Number]: [Test Case Title]
+            Objective: [Purpose of the test case]
+            Preconditions: [Preconditions required before executing the test]
+            Test Steps:
+            1. [Step 1]
+            2. [Step 2]
+            3. [Step 3]
+            Expected Results: [Expected outcome for this test case]
+            Priority: [Low/Medium/High]
+            Status: [Draft/Ready for Execution/Completed]
+            [REPEAT FOR ALL MERGED TEST CASES]
+            END OF TEST PLAN
+
             TEST_CASE_SUMMARY:
             - Requirement ID: [Requirement Identifier]
             - Test Cases: [Summarize test cases mapped to this requirement]
@@ -192,10 +244,10 @@ class QAAgents:
             3. The Expected Results must be precise and measurable.
             4. The format must match EXACTLY - including all headings and bullet points.
 
+            START WITH 'TEST PLAN:' AND END WITH 'END OF TEST PLAN'
+
             Initial Context:
             {initial_prompt}
-
-            START WITH 'TEST PLAN:' AND END WITH 'END OF TEST PLAN'
             """,
             llm_config=self.agent_config,
         )
@@ -209,7 +261,7 @@ class QAAgents:
             }
         )
 
-        return {
+        agents = {
             "api_qa_agent": api_qa_agent,
             "manual_qa_agent": manual_qa_agent,
             "memory_keeper": memory_keeper,
@@ -218,3 +270,7 @@ class QAAgents:
             "user_proxy": user_proxy,
             "test_plan_creator": test_plan_creator
         }
+        self._agent_cache[cache_key] = agents
+        if len(self._agent_cache) > AGENT_CACHE_SIZE:
+            self._agent_cache.popitem(last=False)
+        return agents
@@ -18,7 +18,10 @@ def get_config(local_url: str = "http://localhost:1234/v1") -> Dict:
         "temperature": 0.7,
         "config_list": config_list,
         "timeout": 600,
-        "cache_seed": None
+        "cache_seed": None,
+        # Route every agent to the same prompt cache so the shared system prompt
+        # prefix is reused across agents and chat rounds
+        "extra_body": {"prompt_cache_key": "qa_agents_v1"}
     }
     
     return agent_config
\ No newline at end of file
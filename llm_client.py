@@ -0,0 +1,64 @@
+"""Shared async LLM client with pooled HTTP connections"""
+import asyncio
+import weakref
+from typing import Awaitable, Dict, TypeVar
+import httpx
+from openai import AsyncOpenAI
+
+T = TypeVar("T")
+
+# One client per (event loop, endpoint) so TCP/TLS connections are reused across the agent
+# calls of a run; run_llm closes them before their event loop shuts down
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = weakref.WeakKeyDictionary()
+
+def run_llm(coro: Awaitable[T]) -> T:
+    """Run a coroutine on a new event loop, closing the LLM clients it opened before returning"""
+    async def _run() -> T:
+        try:
+            return await coro
+        finally:
+            await close_async_clients()
+    return asyncio.run(_run())
+
+async def close_async_clients() -> None:
+    """Close the LLM clients opened on the running event loop"""
+    for client in _clients.pop(asyncio.get_running_loop(), {}).values():
+        await client.close()
+
+def get_async_client(agent_config: Dict) -> AsyncOpenAI:
+    """Return the shared AsyncOpenAI client for the configured endpoint"""
+    settings = agent_config["config_list"][0]
+    key = (settings.get("base_url"), settings.get("api_key"))
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), {})
+
+    if key not in loop_clients:
+        http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=16),
+            timeout=agent_config.get("timeout", 600)
+        )
+        loop_clients[key] = AsyncOpenAI(base_url=key[0], api_key=key[1], http_client=http_client)
+    return loop_clients[key]
+
+async def chat_completion(agent_config: Dict, system_message: str, user_message: str, **kwargs) -> str:
+    """Send one system + user turn to the LLM and return the reply text"""
+    settings = agent_config["config_list"][0]
+    response = await get_async_client(agent_config).chat.completions.create(
+        model=settings["model"],
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ],
+        temperature=agent_config.get("temperature"),
+        extra_body=agent_config.get("extra_body"),
+        **kwargs
+    )
+    log_cache_usage(response.usage)
+    return response.choices[0].message.content or ""
+
+def log_cache_usage(usage) -> None:
+    """Print how many prompt tokens were served from the provider's prefix cache"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None)
+    if cached_tokens is not None:
+        print(f"Prompt cache: {cached_tokens}/{usage.prompt_tokens} tokens reused")
@@ -1,7 +1,35 @@
+import string
 from config import get_config
 from agents import QAAgents
 from testplan_generator import TestPlanGenerator
 
+SEP = "-" * 50
+CASE_TMPL = string.Template(
+    "\nTest Case $n: $title\n"
+    "$sep\n"
+    "Objective: $obj\n"
+    "Preconditions: $pre\n"
+    "Steps:\n"
+    "$steps\n"
+    "Expected Results: $exp\n"
+    "Priority: $pri\n"
+    "Status: $st\n"
+)
+
+def format_test_case(test_case: dict) -> str:
+    """Render a single test case with the output template"""
+    return CASE_TMPL.substitute(
+        n=test_case['test_case_number'],
+        title=test_case['title'],
+        sep=SEP,
+        obj=test_case['objective'],
+        pre=test_case['preconditions'],
+        steps="\n".join("- " + step for step in test_case['steps']),
+        exp=test_case['expected_results'],
+        pri=test_case['priority'],
+        st=test_case['status'],
+    )
+
 def main():
     # Get configuration
     agent_config = get_config()
@@ -53,34 +81,17 @@ def main():
     test_plan = test_plan_gen.generate_test_plan(initial_prompt)
     
     
+    # Render each test case once for both printing and saving
+    rendered_cases = [format_test_case(test_case) for test_case in test_plan.get("test_cases", [])]
+
     # Print the generated test cases
     print("\nGenerated Test Plan:")
-    for test_case in test_plan:
-        print(f"\nTest Case {test_case['test_case_number']}: {test_case['title']}")
-        print("-" * 50)
-        print(f"Objective: {test_case['objective']}")
-        print(f"Preconditions: {test_case['preconditions']}")
-        print("Steps:")
-        for step in test_case['steps']:
-            print(f"- {step}")
-        print(f"Expected Results: {test_case['expected_results']}")
-        print(f"Priority: {test_case['priority']}")
-        print(f"Status: {test_case['status']}")
+    print("".join(rendered_cases), end="")
     
     # Save the test plan for reference
     print("\nSaving test plan to file...")
-    with open("test_plan_output/test_plan.txt", "w") as f:
-        for test_case in test_plan:
-            f.write(f"\nTest Case {test_case['test_case_number']}: {test_case['title']}\n")
-            f.write("-" * 50 + "\n")
-            f.write(f"Objective: {test_case['objective']}\n")
-            f.write(f"Preconditions: {test_case['preconditions']}\n")
-            f.write("Steps:\n")
-            for step in test_case['steps']:
-                f.write(f"- {step}\n")
-            f.write(f"Expected Results: {test_case['expected_results']}\n")
-            f.write(f"Priority: {test_case['priority']}\n")
-            f.write(f"Status: {test_case['status']}\n\n")
+    with open("test_plan_output/test_plan.txt", "w", buffering=1 << 20) as f:
+        f.write("".join(case + "\n" for case in rendered_cases))
     
     # Generate the test case documentation
     print("\nGenerating test case documentation...")
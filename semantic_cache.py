@@ -0,0 +1,115 @@
+"""Semantic response cache for test plan generation"""
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+from typing import Callable, Dict, List, Optional
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = 0.95
+
+# Optional dependencies, imported on first cacheable call since they pull in torch
+faiss = None
+SentenceTransformer = None
+_backend_available: Optional[bool] = None
+
+_encoder = None
+
+def _import_backend() -> bool:
+    """Import faiss and sentence-transformers on first use; return False if unavailable"""
+    global faiss, SentenceTransformer, _backend_available
+    if _backend_available is None:
+        try:
+            import faiss as faiss_module
+            from sentence_transformers import SentenceTransformer as encoder_class
+        except ImportError:
+            _backend_available = False
+        else:
+            faiss, SentenceTransformer = faiss_module, encoder_class
+            _backend_available = True
+    return _backend_available
+
+def _embed(text: str):
+    """Embed text as a normalized vector so inner product equals cosine similarity"""
+    global _encoder
+    if _encoder is None:
+        _encoder = SentenceTransformer(EMBEDDING_MODEL)
+    return _encoder.encode([text], normalize_embeddings=True).astype("float32")
+
+def _new_index(dimension: int):
+    """Create an empty inner-product FAISS index"""
+    return faiss.IndexFlatIP(dimension)
+
+def _load(cache_dir: str):
+    """Load the FAISS index and stored test plans from the cache folder"""
+    index_path = os.path.join(cache_dir, "index.faiss")
+    entries_path = os.path.join(cache_dir, "entries.pkl")
+    if not (os.path.exists(index_path) and os.path.exists(entries_path)):
+        return None, []
+
+    with open(entries_path, "rb") as file:
+        entries: List[Dict] = pickle.load(file)
+    return faiss.read_index(index_path), entries
+
+def _store(cache_dir: str, index, entries: List[Dict]) -> None:
+    """Persist the FAISS index and stored test plans to the cache folder"""
+    os.makedirs(cache_dir, exist_ok=True)
+    faiss.write_index(index, os.path.join(cache_dir, "index.faiss"))
+    with open(os.path.join(cache_dir, "entries.pkl"), "wb") as file:
+        pickle.dump(entries, file)
+
+def semantic_cache(func: Callable) -> Callable:
+    """Return a stored test plan when a near-identical prompt was already answered
+
+    Wraps TestPlanGenerator.generate_test_plan. Entries are partitioned by the
+    exact generation parameters (case count, model, temperature) and matched on
+    prompt similarity within a partition. Only successfully extracted plans from
+    deterministic runs (temperature 0) are stored, and the cache is skipped
+    entirely when faiss or sentence-transformers are not installed.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> Dict:
+        # Bind against the wrapped signature so its defaults stay the single source of truth
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        self = bound.arguments["self"]
+        initial_prompt = bound.arguments["initial_prompt"]
+        num_test_cases = bound.arguments["num_test_cases"]
+        output_file_name = bound.arguments["output_file_name"]
+
+        temperature = self.agent_config.get("temperature", 0)
+        if temperature > 0 or not _import_backend():
+            return func(*args, **kwargs)
+
+        params = (num_test_cases, self.agent_config["config_list"][0]["model"], temperature)
+        params_key = hashlib.sha256(repr(params).encode("utf-8")).hexdigest()[:16]
+        cache_dir = os.path.join(self.output_folder, ".cache", params_key)
+
+        embedding = _embed(initial_prompt)
+        index, entries = _load(cache_dir)
+        if index is not None and index.ntotal:
+            scores, ids = index.search(embedding, 1)
+            if scores[0][0] >= SIMILARITY_THRESHOLD:
+                print("Using cached test plan...")
+                test_plan = entries[ids[0][0]]
+                self._save_test_plan_to_file(test_plan, output_file_name)
+                return test_plan
+
+        test_plan = func(*args, **kwargs)
+
+        # Never cache failed runs, or a transient error would be replayed forever
+        if not self._is_extracted_plan(test_plan):
+            return test_plan
+
+        if index is None:
+            index = _new_index(embedding.shape[1])
+        index.add(embedding)
+        entries.append(test_plan)
+        _store(cache_dir, index, entries)
+
+        return test_plan
+
+    return wrapper
@@ -0,0 +1,50 @@
+"""Tests for agent creation and caching"""
+import pytest
+import agents
+from agents import QAAgents
+
+AGENT_CONFIG = {"config_list": [{"model": "test-model", "base_url": "http://localhost:1234/v1", "api_key": "not-needed"}]}
+
+def make_case(case_id):
+    return {
+        "id": case_id,
+        "title": f"Case {case_id}",
+        "objective": "Objective",
+        "preconditions": "Preconditions",
+        "steps": ["Step"],
+        "expected_results": "Expected"
+    }
+
+@pytest.fixture
+def qa_agents():
+    return QAAgents(AGENT_CONFIG, [make_case(1)])
+
+def test_cache_hit_returns_same_agents_with_cleared_history(qa_agents):
+    first = qa_agents.create_agents("prompt")
+    user_proxy = first["user_proxy"]
+    user_proxy.chat_messages[first["memory_keeper"]].append({"role": "user", "content": "previous run"})
+
+    second = qa_agents.create_agents("prompt")
+
+    assert second is first
+    assert all(not messages for messages in user_proxy.chat_messages.values())
+
+def test_different_prompt_or_case_ids_miss_the_cache(qa_agents):
+    first = qa_agents.create_agents("prompt")
+
+    assert qa_agents.create_agents("another prompt") is not first
+
+    qa_agents.test_plan.append(make_case(2))
+    rebuilt = qa_agents.create_agents("prompt")
+    assert rebuilt is not first
+    assert "Case 2" in rebuilt["memory_keeper"].system_message
+
+def test_oldest_entry_is_evicted(qa_agents, monkeypatch):
+    monkeypatch.setattr(agents, "AGENT_CACHE_SIZE", 2)
+    oldest = qa_agents.create_agents("prompt 0")
+    qa_agents.create_agents("prompt 1")
+    recent = qa_agents.create_agents("prompt 2")
+
+    assert len(qa_agents._agent_cache) == 2
+    assert qa_agents.create_agents("prompt 2") is recent
+    assert qa_agents.create_agents("prompt 0") is not oldest
@@ -0,0 +1,100 @@
+"""Tests for the semantic test plan cache"""
+import pytest
+import semantic_cache
+from testplan_generator import NO_TEST_PLAN
+
+class FakeIndex:
+    """In-memory stand-in for a FAISS inner-product index"""
+    def __init__(self, dimension):
+        self.vectors = []
+
+    @property
+    def ntotal(self):
+        return len(self.vectors)
+
+    def add(self, embedding):
+        self.vectors.extend(embedding)
+
+    def search(self, embedding, k):
+        scores = [sum(a * b for a, b in zip(embedding[0], vector)) for vector in self.vectors]
+        best = max(range(len(scores)), key=scores.__getitem__)
+        return [[scores[best]]], [[best]]
+
+class FakeEmbedding(list):
+    shape = (1, 2)
+
+EMBEDDINGS = {
+    "prompt": FakeEmbedding([[1.0, 0.0]]),
+    "prompt, reworded": FakeEmbedding([[0.99, 0.14]]),
+    "unrelated": FakeEmbedding([[0.0, 1.0]])
+}
+
+class FakeGenerator:
+    def __init__(self, output_folder, temperature=0, result=None):
+        self.agent_config = {"temperature": temperature, "config_list": [{"model": "test-model"}]}
+        self.output_folder = output_folder
+        self.result = result or {"test_plan": "Plan body"}
+        self.calls = []
+        self.saved = []
+
+    @semantic_cache.semantic_cache
+    def generate_test_plan(self, initial_prompt, num_test_cases=25, output_file_name="test_plan.txt"):
+        self.calls.append((initial_prompt, num_test_cases, output_file_name))
+        return self.result
+
+    def _save_test_plan_to_file(self, test_plan, file_name):
+        self.saved.append(file_name)
+
+    @staticmethod
+    def _is_extracted_plan(test_plan):
+        return test_plan.get("test_plan", NO_TEST_PLAN) != NO_TEST_PLAN
+
+@pytest.fixture
+def store(monkeypatch):
+    """Stub the embedding model and FAISS persistence with in-memory fakes"""
+    indexes = {}
+    monkeypatch.setattr(semantic_cache, "_import_backend", lambda: True)
+    monkeypatch.setattr(semantic_cache, "_embed", EMBEDDINGS.__getitem__)
+    monkeypatch.setattr(semantic_cache, "_new_index", FakeIndex)
+    monkeypatch.setattr(semantic_cache, "_load", lambda cache_dir: indexes.get(cache_dir, (None, [])))
+    monkeypatch.setattr(semantic_cache, "_store", lambda cache_dir, index, entries: indexes.__setitem__(cache_dir, (index, entries)))
+    return indexes
+
+def test_hit_returns_stored_plan_and_saves_it(store, tmp_path):
+    generator = FakeGenerator(str(tmp_path))
+    first = generator.generate_test_plan("prompt")
+    second = generator.generate_test_plan("prompt, reworded", output_file_name="other.txt")
+
+    assert second == first
+    assert len(generator.calls) == 1
+    assert generator.saved == ["other.txt"]
+
+def test_miss_on_different_prompt_or_parameters(store, tmp_path):
+    generator = FakeGenerator(str(tmp_path))
+    generator.generate_test_plan("prompt")
+    generator.generate_test_plan("unrelated")
+    generator.generate_test_plan("prompt", 10)
+
+    assert [call[:2] for call in generator.calls] == [("prompt", 25), ("unrelated", 25), ("prompt", 10)]
+
+def test_skipped_when_temperature_is_positive(store, tmp_path):
+    generator = FakeGenerator(str(tmp_path), temperature=0.7)
+    generator.generate_test_plan("prompt")
+    generator.generate_test_plan("prompt")
+
+    assert len(generator.calls) == 2
+    assert store == {}
+
+def test_failed_runs_are_not_stored(store, tmp_path):
+    generator = FakeGenerator(str(tmp_path), result={"test_plan": NO_TEST_PLAN})
+    generator.generate_test_plan("prompt")
+    generator.generate_test_plan("prompt")
+
+    assert len(generator.calls) == 2
+    assert store == {}
+
+def test_wrapped_defaults_are_forwarded(store, tmp_path):
+    generator = FakeGenerator(str(tmp_path), temperature=0.7)
+    generator.generate_test_plan(initial_prompt="prompt")
+
+    assert generator.calls == [("prompt", 25, "test_plan.txt")]
@@ -0,0 +1,160 @@
+"""Tests for parsing test cases out of agent replies"""
+import asyncio
+import re
+from types import SimpleNamespace
+import pytest
+import testplan_generator
+
+@pytest.fixture
+def generator(tmp_path):
+    return testplan_generator.TestPlanGenerator({}, {"config_list": [{"model": "test-model"}]}, output_folder=str(tmp_path))
+
+def parse(generator, content):
+    return generator._emergency_test_plan_processing([{"content": content}])["test_cases"]
+
+def test_parses_all_fields_and_strips_step_markers(generator):
+    content = """TEST PLAN:
+    Test Case 000001 : Login succeeds
+    Objective: Verify login
+    Preconditions: User account exists
+    Test Steps:
+    1. Open the login page
+    2. Enter valid credentials
+    - Submit the form
+    Expected Results: Dashboard is shown
+    Priority: High
+    Status: Ready for Execution
+    END OF TEST PLAN"""
+
+    assert parse(generator, content) == [{
+        "test_case_number": 1,
+        "title": "Login succeeds",
+        "objective": "Verify login",
+        "preconditions": "User account exists",
+        "steps": ["Open the login page", "Enter valid credentials", "Submit the form"],
+        "expected_results": "Dashboard is shown",
+        "priority": "High",
+        "status": "Ready for Execution"
+    }]
+
+def test_empty_fields_do_not_capture_the_next_line(generator):
+    content = "Test Case 1: Empty fields\nObjective: Check\nPreconditions:\nTest Steps:\n1. Do it\nExpected Results:\nPriority: High\nStatus: Draft\n"
+
+    test_case = parse(generator, content)[0]
+    assert test_case["preconditions"] == ""
+    assert test_case["expected_results"] == ""
+    assert test_case["priority"] == "High"
+    assert test_case["steps"] == ["Do it"]
+
+def test_splits_multiple_cases_and_applies_defaults(generator):
+    content = "Test Case 1: First\nObjective: One\n\nTest Case 2:\nObjective: Two\n- Only step\n"
+
+    first, second = parse(generator, content)
+    assert (first["test_case_number"], first["title"], first["steps"]) == (1, "First", [])
+    assert (second["test_case_number"], second["title"], second["steps"]) == (2, "Test Case 2", ["Only step"])
+    assert (second["priority"], second["status"]) == ("Medium", "Draft")
+
+def test_handles_crlf_line_endings(generator):
+    content = "Test Case 3: Windows\r\nObjective: Parse CRLF\r\n1. Step one\r\nPriority: Low\r\n"
+
+    test_case = parse(generator, content)[0]
+    assert test_case["title"] == "Windows"
+    assert test_case["objective"] == "Parse CRLF"
+    assert test_case["steps"] == ["Step one"]
+    assert test_case["priority"] == "Low"
+
+def test_ignores_messages_without_test_case_fields(generator):
+    assert parse(generator, "Test Case 1 is mentioned but has no fields") == []
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+def test_stream_merge_collects_cases_and_plan(generator, monkeypatch, chunk_size):
+    content = "TEST PLAN:\nTest Case 1: A\nObjective: o\nStatus: Draft\nTest Case 2: B\nObjective: p\nStatus: Ready\nEND OF TEST PLAN"
+
+    async def stream():
+        for i in range(0, len(content), chunk_size):
+            delta = SimpleNamespace(content=content[i:i + chunk_size])
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=delta)])
+
+    async def create(**kwargs):
+        return stream()
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(testplan_generator, "get_async_client", lambda agent_config: client)
+    generator.agents = {"test_case_orchestrator": SimpleNamespace(system_message="merge")}
+
+    messages = []
+    test_plan = asyncio.run(generator._stream_merge("prompt", messages))
+
+    assert test_plan["test_plan"].startswith("Test Case 1: A")
+    assert [(case["title"], case["status"]) for case in test_plan["test_cases"]] == [("A", "Draft"), ("B", "Ready")]
+    assert messages[-1]["content"] == content
+
+def test_batch_generate_cases_splits_bins_and_reports_missing(generator, monkeypatch, capsys):
+    requests = []
+
+    async def chat_completion(agent_config, system_message, user_message, max_tokens):
+        requests.append(max_tokens)
+        numbers = [int(number) for number in re.findall(r"Test Case (\d+)", user_message.split("\n")[0])]
+        # Simulate a truncated reply that never reaches test case 3
+        return "\n".join(f"Test Case {n}: Case {n}\nObjective: o\nStatus: Draft" for n in numbers if n != 3)
+
+    monkeypatch.setattr(testplan_generator, "chat_completion", chat_completion)
+    generator.agents = {"test_plan_creator": SimpleNamespace(system_message="create")}
+
+    indices = list(range(1, 8))
+    test_cases = generator.batch_generate_cases("prompt", indices, ["load"] * 6 + ["smoke"])
+
+    assert [case["test_case_number"] for case in test_cases] == [1, 2, 4, 5, 6, 7]
+    assert max(requests) <= testplan_generator.MAX_BATCH_TOKENS
+    assert len(requests) == 3
+    assert "no output for test cases [3]" in capsys.readouterr().out
+
+def test_batch_generate_cases_rejects_mismatched_categories(generator):
+    with pytest.raises(ValueError):
+        generator.batch_generate_cases("prompt", [1, 2], ["smoke"])
+
+def test_save_test_plan_writes_in_background_and_reports_failures(generator, tmp_path, capsys):
+    generator._save_test_plan_to_file({"test_plan": "Plan body"}, "plan.txt").result()
+    assert (tmp_path / "plan.txt").read_text(encoding="utf-8") == "Plan body"
+
+    future = generator._save_test_plan_to_file({"test_plan": "Plan body"}, "missing/plan.txt")
+    future.exception()
+    generator._io_pool.shutdown(wait=True)
+    assert "Error saving test plan" in capsys.readouterr().out
+
+def test_extraction_ignores_markers_quoted_in_the_prompt(generator):
+    messages = [
+        {"name": "user_proxy", "content": "START WITH 'TEST PLAN:' AND END WITH 'END OF TEST PLAN'"},
+        {"name": "manual_qa_agent", "content": "TEST_CASES:\n- Title: No plan markers here"}
+    ]
+
+    test_plan = generator._extract_test_plan_content(messages)
+    assert test_plan == {"test_plan": testplan_generator.NO_TEST_PLAN}
+    assert not generator._is_extracted_plan(test_plan)
+
+def test_parallel_chat_merges_drafts_when_a_specialist_fails(generator, monkeypatch, capsys):
+    async def chat_completion(agent_config, system_message, user_message):
+        if system_message == "api":
+            raise TimeoutError("timed out")
+        return f"draft from {system_message}"
+
+    merge_prompts = []
+
+    async def stream_merge(merge_prompt, messages):
+        merge_prompts.append(merge_prompt)
+        return None
+
+    monkeypatch.setattr(testplan_generator, "chat_completion", chat_completion)
+    monkeypatch.setattr(generator, "_stream_merge", stream_merge)
+    generator.agents = {
+        "test_plan_creator": SimpleNamespace(system_message="creator"),
+        "manual_qa_agent": SimpleNamespace(system_message="manual"),
+        "api_qa_agent": SimpleNamespace(system_message="api")
+    }
+
+    messages = []
+    asyncio.run(generator._run_parallel_chat("prompt", messages))
+
+    assert [msg["name"] for msg in messages] == ["user_proxy", "test_plan_creator", "manual_qa_agent"]
+    assert "draft from creator" in merge_prompts[0] and "draft from manual" in merge_prompts[0]
+    assert "Error from api_qa_agent: timed out" in capsys.readouterr().out
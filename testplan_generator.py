@@ -1,8 +1,33 @@
 """Generate detailed test plans using AutoGen agents with improved error handling and file saving"""
 import autogen
-from typing import Dict, List
+from typing import Dict, List, Optional
 import re
 import os
+import asyncio
+import io
+from concurrent.futures import Future, ThreadPoolExecutor
+from llm_client import chat_completion, get_async_client, log_cache_usage, run_llm
+from semantic_cache import semantic_cache
+
+# Patterns used to parse test cases out of free-form agent replies
+TEST_CASE_RE = re.compile(r"Test Case[ \t]+(\d+)[ \t]*:?[ \t]*(.*)")
+FIELDS_RE = re.compile(r"^[ \t]*(Objective|Preconditions|Expected Results|Priority|Status):[ \t]*(.*?)[ \t]*\r?$", re.M)
+STEP_RE = re.compile(r"^[ \t]*(?:-|\d+\.)[ \t]*(\S.*?)[ \t]*\r?$", re.M)
+STATUS_LINE_RE = re.compile(r"^[ \t]*Status:.*\n", re.M)
+TEST_PLAN_RE = re.compile(r"TEST PLAN:(.*?)END OF TEST PLAN", re.S)
+
+# Output token budget per test case for each length bin, and the categories that pick a bin
+BIN_MAX_TOKENS = {"short": 256, "medium": 512, "long": 1024}
+SHORT_CASE_KEYWORDS = ("smoke", "unit", "sanity")
+LONG_CASE_KEYWORDS = ("integration", "load", "security", "performance", "end-to-end")
+# Output token cap for a single batch request; larger bins are split into several requests
+MAX_BATCH_TOKENS = 4096
+
+# Placeholder returned when no delimited test plan is found in the chat
+NO_TEST_PLAN = "No test plan could be extracted."
+
+# QA specialists that answer the test plan prompt independently of each other
+PARALLEL_AGENTS = ["test_plan_creator", "manual_qa_agent", "api_qa_agent"]
 
 class TestPlanGenerator:
     def __init__(self, agents: Dict[str, autogen.ConversableAgent], agent_config: Dict, output_folder: str = "output"):
@@ -10,27 +35,20 @@ class TestPlanGenerator:
         self.agent_config = agent_config
         self.output_folder = output_folder
 
+        # Background threads for writing output files off the generation path;
+        # concurrent.futures joins them at interpreter exit, so pending writes still finish
+        self._io_pool = ThreadPoolExecutor(max_workers=2)
+
         # Ensure the output folder exists
         if not os.path.exists(self.output_folder):
             os.makedirs(self.output_folder)
 
+    @semantic_cache
     def generate_test_plan(self, initial_prompt: str, num_test_cases: int = 25, output_file_name: str = "test_plan.txt") -> Dict:
         """Generate a comprehensive test plan based on the initial prompt and save it to a file"""
         print("\nGenerating test plan...")
 
-        groupchat = autogen.GroupChat(
-            agents=[
-                self.agents["test_plan_creator"],
-                self.agents["user_proxy"],
-                self.agents["manual_qa_agent"],
-                self.agents["api_qa_agent"]
-                ],
-            messages=[],
-            max_round=6,
-            speaker_selection_method="round_robin"
-        )
-
-        manager = autogen.GroupChatManager(groupchat=groupchat, llm_config=self.agent_config)
+        messages: List[Dict] = []
 
         test_plan_prompt = f"""Create a detailed test plan with the following requirements:
         
@@ -61,29 +79,192 @@ class TestPlanGenerator:
         START WITH 'TEST PLAN:' AND END WITH 'END OF TEST PLAN'"""
 
         try:
-            # Initiate the chat
-            self.agents["user_proxy"].initiate_chat(
-                manager,
-                message=test_plan_prompt
-            )
+            # Run the QA specialists in parallel on one event loop, then stream the merged plan
+            test_plan = run_llm(self._run_parallel_chat(test_plan_prompt, messages))
 
-            # Extract the test plan from the chat messages
-            test_plan = self._process_test_plan_results(groupchat.messages)
+            # Fall back to scanning the chat messages if the stream had no complete plan
+            if test_plan is None:
+                test_plan = self._process_test_plan_results(messages)
 
-            # Save the test plan to a file
+            # Save the test plan to a file in the background
             self._save_test_plan_to_file(test_plan, output_file_name)
 
             return test_plan
         except Exception as e:
             print(f"Error generating test plan: {str(e)}")
             # Try to salvage any test plan content
-            test_plan = self._emergency_test_plan_processing(groupchat.messages)
+            test_plan = self._emergency_test_plan_processing(messages)
 
             # Save the salvaged plan to a file
             self._save_test_plan_to_file(test_plan, output_file_name)
 
             return test_plan
 
+    def batch_generate_cases(self, initial_prompt: str, indices: List[int], categories: Optional[List[str]] = None) -> List[Dict]:
+        """Generate the test cases for the given case numbers, batched by expected output length"""
+        if categories is not None and len(categories) != len(indices):
+            raise ValueError(f"Expected {len(indices)} categories, got {len(categories)}")
+
+        print(f"\nGenerating {len(indices)} test cases in batches...")
+
+        cases = [
+            {"index": index, "category": categories[i] if categories else ""}
+            for i, index in enumerate(indices)
+        ]
+        bins = self._bin_requests(cases)
+        replies = run_llm(self._dispatch_bins(initial_prompt, bins))
+
+        # Keep only the requested case numbers and report any the model skipped or truncated
+        generated: Dict[int, Dict] = {}
+        for test_case in self._parse_test_cases([{"content": reply} for reply in replies]):
+            if test_case["test_case_number"] in indices:
+                generated.setdefault(test_case["test_case_number"], test_case)
+
+        missing = [index for index in indices if index not in generated]
+        if missing:
+            print(f"Warning: no output for test cases {missing}")
+
+        return [generated[index] for index in indices if index in generated]
+
+    def _bin_requests(self, cases: List[Dict]) -> Dict[str, List[Dict]]:
+        """Group requested test cases by expected output length based on their category"""
+        bins: Dict[str, List[Dict]] = {name: [] for name in BIN_MAX_TOKENS}
+        for case in cases:
+            category = case["category"].lower()
+            if any(keyword in category for keyword in LONG_CASE_KEYWORDS):
+                bins["long"].append(case)
+            elif any(keyword in category for keyword in SHORT_CASE_KEYWORDS):
+                bins["short"].append(case)
+            else:
+                bins["medium"].append(case)
+        return {name: binned for name, binned in bins.items() if binned}
+
+    async def _dispatch_bins(self, initial_prompt: str, bins: Dict[str, List[Dict]]) -> List[str]:
+        """Send each bin concurrently, split into requests that stay under MAX_BATCH_TOKENS"""
+        requests = []
+        for name, binned in bins.items():
+            cases_per_request = max(1, MAX_BATCH_TOKENS // BIN_MAX_TOKENS[name])
+            for start in range(0, len(binned), cases_per_request):
+                batch = binned[start:start + cases_per_request]
+                requests.append(chat_completion(
+                    self.agent_config,
+                    self.agents["test_plan_creator"].system_message,
+                    self._batch_prompt(initial_prompt, batch),
+                    max_tokens=BIN_MAX_TOKENS[name] * len(batch)
+                ))
+        return await asyncio.gather(*requests)
+
+    @staticmethod
+    def _batch_prompt(initial_prompt: str, cases: List[Dict]) -> str:
+        """Build a prompt asking for exactly the given test cases"""
+        case_ids = ", ".join(
+            f"Test Case {case['index']}" + (f" ({case['category']})" if case["category"] else "")
+            for case in cases
+        )
+        return f"""Write ONLY the following test cases, in this order: {case_ids}
+
+        Context: {initial_prompt}
+
+        Each test case must follow this format:
+          Test Case [Number]: [Test Case Title]
+          Objective: [Purpose of the test case]
+          Preconditions: [Preconditions required before executing the test]
+          Test Steps:
+            1. [Step 1]
+            2. [Step 2]
+            3. [Step 3]
+          Expected Results: [Expected outcome for this test case]
+          Priority: [Low/Medium/High]
+          Status: [Draft/Ready for Execution/Completed]"""
+
+    async def _run_parallel_chat(self, test_plan_prompt: str, messages: List[Dict]) -> Optional[Dict]:
+        """Query the independent QA specialists concurrently, then merge their drafts in one pass"""
+        messages.append({"name": "user_proxy", "role": "user", "content": test_plan_prompt})
+
+        replies = await asyncio.gather(*(
+            chat_completion(self.agent_config, self.agents[name].system_message, test_plan_prompt)
+            for name in PARALLEL_AGENTS
+        ), return_exceptions=True)
+
+        # Merge whichever drafts came back; one failing specialist should not discard the others
+        drafts = {}
+        for name, reply in zip(PARALLEL_AGENTS, replies):
+            if isinstance(reply, Exception):
+                print(f"Error from {name}: {str(reply)}")
+                continue
+            drafts[name] = reply
+            messages.append({"name": name, "role": "user", "content": reply})
+
+        if not drafts:
+            raise RuntimeError("All QA specialists failed to produce a draft")
+
+        merge_prompt = "\n\n".join(
+            [f"Merge the following drafts into a single test plan.\n\nOriginal request:\n{test_plan_prompt}"]
+            + [f"--- {name} ---\n{content}" for name, content in drafts.items()]
+            + ["Keep the test case format of the original request. START WITH 'TEST PLAN:' AND END WITH 'END OF TEST PLAN'"]
+        )
+        return await self._stream_merge(merge_prompt, messages)
+
+    async def _stream_merge(self, merge_prompt: str, messages: List[Dict]) -> Optional[Dict]:
+        """Stream the orchestrator's merge pass, parsing test cases and the plan as tokens arrive
+
+        Returns the extracted plan with the test cases parsed from the stream under
+        "test_cases", or None if the stream did not contain a complete plan.
+        """
+        stream = await get_async_client(self.agent_config).chat.completions.create(
+            model=self.agent_config["config_list"][0]["model"],
+            messages=[
+                {"role": "system", "content": self.agents["test_case_orchestrator"].system_message},
+                {"role": "user", "content": merge_prompt}
+            ],
+            temperature=self.agent_config.get("temperature"),
+            extra_body=self.agent_config.get("extra_body"),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        buffer = io.StringIO()
+        # Text after the last parsed Status: line, and the last characters seen, so neither the
+        # case parser nor the end-marker check has to copy the whole buffer on every chunk
+        pending = ""
+        tail = ""
+        end_marker = "END OF TEST PLAN"
+        test_cases: List[Dict] = []
+        test_plan = None
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    log_cache_usage(chunk.usage)
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                buffer.write(delta)
+                pending += delta
+
+                # Collect each test case as soon as its closing Status: line is complete
+                if "\n" in delta:
+                    parsed_idx = 0
+                    for status_line in STATUS_LINE_RE.finditer(pending):
+                        headers = list(TEST_CASE_RE.finditer(pending, parsed_idx, status_line.start()))
+                        if headers:
+                            test_case = self._build_test_case(headers[-1], pending[headers[-1].end():status_line.end()])
+                            test_cases.append(test_case)
+                            print(f"Received Test Case {test_case['test_case_number']}: {test_case['title']}")
+                        parsed_idx = status_line.end()
+                    pending = pending[parsed_idx:]
+
+                # Only look for the full plan once its end marker has streamed in
+                window = tail + delta
+                if test_plan is None and end_marker in window:
+                    match = TEST_PLAN_RE.search(buffer.getvalue())
+                    if match:
+                        test_plan = {"test_plan": match.group(1).strip(), "test_cases": list(test_cases)}
+                tail = window[-(len(end_marker) - 1):]
+        finally:
+            messages.append({"name": "test_case_orchestrator", "role": "user", "content": buffer.getvalue()})
+
+        return test_plan
+
     def _process_test_plan_results(self, messages: List[Dict]) -> Dict:
         """Process the test plan results from the chat messages"""
         print("Processing test plan results...")
@@ -93,18 +274,23 @@ class TestPlanGenerator:
         """Extract the test plan content from messages with error handling"""
         print("Extracting test plan content...")
 
-        # Look for content between "TEST PLAN:" and "END OF TEST PLAN"
+        # Look for content between "TEST PLAN:" and "END OF TEST PLAN" in agent replies only;
+        # the user_proxy prompt quotes both markers itself
         for msg in reversed(messages):
-            content = msg.get("content", "")
-            if "TEST PLAN:" in content:
-                start_idx = content.find("TEST PLAN:")
-                end_idx = content.find("END OF TEST PLAN")
-
-                if start_idx != -1 and end_idx != -1:
-                    return {"test_plan": content[start_idx:end_idx].strip()}
+            if msg.get("name") == "user_proxy":
+                continue
+            match = TEST_PLAN_RE.search(msg.get("content") or "")
+            if match:
+                plan_text = match.group(1).strip()
+                return {"test_plan": plan_text, "test_cases": self._parse_test_cases([{"content": plan_text}])}
 
         print("No structured test plan found in the messages.")
-        return {"test_plan": "No test plan could be extracted."}
+        return {"test_plan": NO_TEST_PLAN}
+
+    @staticmethod
+    def _is_extracted_plan(test_plan: Dict) -> bool:
+        """Return True if the result holds a real extracted plan rather than a fallback"""
+        return test_plan.get("test_plan", NO_TEST_PLAN) != NO_TEST_PLAN
 
     def _emergency_test_plan_processing(self, messages: List[Dict]) -> Dict:
         """Fallback processing when test plan extraction fails"""
@@ -116,67 +302,66 @@ class TestPlanGenerator:
             "testing_strategy": "To be determined",
             "test_environment": "To be determined",
             "schedule": "To be determined",
-            "test_cases": [],
+            "test_cases": self._parse_test_cases(messages),
             "risk_assessment": "To be determined"
         }
 
-        current_test_case = None
+        return test_plan
 
-        # Extract test cases
+    def _parse_test_cases(self, messages: List[Dict]) -> List[Dict]:
+        """Extract test cases from messages, slicing each message between consecutive test case headers"""
+        test_cases = []
         for msg in messages:
             content = msg.get("content", "")
-            lines = content.split("\n")
-
-            for line in lines:
-                # Look for test case markers
-                test_case_match = re.search(r"Test Case (\d+)", line)
-                if test_case_match and "Objective:" in content:
-                    if current_test_case:
-                        test_plan["test_cases"].append(current_test_case)
-
-                    current_test_case = {
-                        "test_case_number": int(test_case_match.group(1)),
-                        "title": line.split(":")[-1].strip() if ":" in line else f"Test Case {test_case_match.group(1)}",
-                        "objective": "",
-                        "preconditions": "",
-                        "steps": [],
-                        "expected_results": "",
-                        "priority": "Medium",
-                        "status": "Draft"
-                    }
-
-                # Extract fields for the current test case
-                if current_test_case:
-                    if line.strip().startswith("Objective:"):
-                        current_test_case["objective"] = line.split("Objective:")[-1].strip()
-                    elif line.strip().startswith("Preconditions:"):
-                        current_test_case["preconditions"] = line.split("Preconditions:")[-1].strip()
-                    elif line.strip().startswith("Expected Results:"):
-                        current_test_case["expected_results"] = line.split("Expected Results:")[-1].strip()
-                    elif line.strip().startswith("Priority:"):
-                        current_test_case["priority"] = line.split("Priority:")[-1].strip()
-                    elif line.strip().startswith("Status:"):
-                        current_test_case["status"] = line.split("Status:")[-1].strip()
-                    elif line.strip().startswith("-") or re.match(r"\d+\.", line.strip()):
-                        current_test_case["steps"].append(line.strip())
-
-        # Append the last test case
-        if current_test_case:
-            test_plan["test_cases"].append(current_test_case)
-
-        return test_plan
+            if "Objective:" not in content:
+                continue
+
+            headers = list(TEST_CASE_RE.finditer(content))
+            for i, header in enumerate(headers):
+                end_idx = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+                test_cases.append(self._build_test_case(header, content[header.end():end_idx]))
+
+        return test_cases
+
+    @staticmethod
+    def _build_test_case(header: re.Match, body: str) -> Dict:
+        """Build a test case dict from its header match and the text that follows it"""
+        fields = dict(FIELDS_RE.findall(body))
+        return {
+            "test_case_number": int(header.group(1)),
+            "title": header.group(2).strip() or f"Test Case {header.group(1)}",
+            "objective": fields.get("Objective", ""),
+            "preconditions": fields.get("Preconditions", ""),
+            "steps": STEP_RE.findall(body),
+            "expected_results": fields.get("Expected Results", ""),
+            "priority": fields.get("Priority", "Medium"),
+            "status": fields.get("Status", "Draft")
+        }
 
-    def _save_test_plan_to_file(self, test_plan: Dict, file_name: str) -> None:
-        """Save the generated test plan to a file in the specified folder"""
+    def _save_test_plan_to_file(self, test_plan: Dict, file_name: str) -> Future:
+        """Save the generated test plan to a file in the specified folder on a background thread"""
         output_path = os.path.join(self.output_folder, file_name)
         print(f"Saving test plan to {output_path}...")
-
-        with open(output_path, "w", encoding="utf-8") as file:
-            if isinstance(test_plan, dict) and "test_plan" in test_plan:
-                file.write(test_plan["test_plan"])
-            else:
-                file.write("TEST PLAN:\n")
-                file.write(str(test_plan))
-                file.write("\nEND OF TEST PLAN")
+        future = self._io_pool.submit(self._write_sync, test_plan, output_path)
+        future.add_done_callback(lambda done: self._report_write_failure(done, output_path))
+        return future
+
+    @staticmethod
+    def _report_write_failure(future: Future, output_path: str) -> None:
+        """Print the error of a failed background write as soon as it completes"""
+        error = future.exception()
+        if error is not None:
+            print(f"Error saving test plan to {output_path}: {str(error)}")
+
+    @staticmethod
+    def _write_sync(test_plan: Dict, output_path: str) -> None:
+        """Write the test plan to disk"""
+        if isinstance(test_plan, dict) and "test_plan" in test_plan:
+            content = test_plan["test_plan"]
+        else:
+            content = "".join(["TEST PLAN:\n", str(test_plan), "\nEND OF TEST PLAN"])
+
+        with open(output_path, "w", encoding="utf-8", buffering=1 << 20) as file:
+            file.write(content)
 
         print(f"Test plan saved successfully at {output_path}!")